@@ -13,7 +13,6 @@ import numpy as np
 from scipy.stats import chi2_contingency, truncnorm
 from sklearn.linear_model import LinearRegression
 import math
-import matplotlib.pyplot as plt
 import statsmodels.formula.api as smf
 
 """
@@ -418,6 +417,9 @@ Given some multi-chart data, plot it and save the plot.
 :param show_plot: Whether or not to display the plot before saving.
 '''
 def plot_multi_chart_data(types, multi_data, props, out_path, out_filename='aggregate-chart', show_plot=False):
+  # Imported lazily so simulation runs that never plot skip the
+  # matplotlib import cost
+  import matplotlib.pyplot as plt
   if PLOT_TYPES.LINE in types:
     plot = plot_nlogo_multi_chart_line(props, multi_data)
     plt.savefig(f'{out_path}/{out_filename}_line.png')
@@ -444,6 +446,7 @@ describes pen colors, x and y min and max, etc.
 :param multi_data: A dictionary (keyed by line) of matrices where each row is one simulation's worth of data points.
 '''
 def plot_nlogo_multi_chart_stacked(props, multi_data):
+  import matplotlib.pyplot as plt
   init_dist_width = 10
 
   # series = pd.Series(data)
@@ -496,6 +499,7 @@ describes pen colors, x and y min and max, etc.
 :param multi_data: A list of dataframes that contain chart data.
 '''
 def plot_nlogo_multi_chart_line(props, multi_data):
+  import matplotlib.pyplot as plt
   # series = pd.Series(data)
   # print(multi_data)
   fig, (ax) = plt.subplots(1, figsize=(8,6))
@@ -538,6 +542,7 @@ describes pen colors, x and y min and max, etc.
 :param multi_data: A list of dataframes that contain chart data.
 '''
 def plot_nlogo_histogram(props, multi_data):
+  import matplotlib.pyplot as plt
   # series = pd.Series(data)
   # print(multi_data)
   fig, (ax) = plt.subplots(1, figsize=(8,6))
@@ -929,6 +934,7 @@ def chi_sq_global(chi2_data):
 
 
 def plot_chi_sq_data(chi2_data, props, title, out_path, out_filename):
+  import matplotlib.pyplot as plt
   '''
   Plot a time series calculation of chi squared measures per timestep.
 
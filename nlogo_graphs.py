@@ -5,28 +5,150 @@ from Python to NetLogo.
 Author: Nick Rabb (nick.rabb2@gmail.com)
 '''
 
+import os
+import re
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 import networkx as nx
 import numpy as np
+import scipy.sparse as sparse
 import mag
 from networkx import community
 from messaging import dist_to_agent_brain
-from random import random
 from kronecker import kronecker_pow
-from functools import reduce
-import matplotlib.cm as cm
-import matplotlib.pyplot as plt
+from functools import reduce, wraps
 from enums import INSTITUTION_ECOSYSTEM_TYPES, eco_file_names
 from data import HomophilicThetaRow, normal_dist_multiple
 
+# One module-level PCG64 generator -- one C call for millions of samples
+# beats per-call random.random()
+_RNG = np.random.default_rng()
+
+# How many generated graphs memoize_seeded keeps per generator
+GRAPH_CACHE_SIZE = 64
+
+'''
+Memoize a graph generator on its full argument list, but only for
+calls that pass a seed -- unseeded calls stay random. Experiment grids
+that sweep other parameters regenerate identical topologies many
+times; a cache hit skips the O(n^2) sampling entirely. Hits return a
+deep copy so callers can mutate the result safely.
+'''
+def memoize_seeded(fn):
+  cache = {}
+  sig = inspect.signature(fn)
+  @wraps(fn)
+  def wrapper(*args, **kwargs):
+    bound = sig.bind(*args, **kwargs)
+    bound.apply_defaults()
+    if bound.arguments.get('seed') is None:
+      return fn(*args, **kwargs)
+    key = tuple(sorted(bound.arguments.items()))
+    if key not in cache:
+      if len(cache) >= GRAPH_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+      cache[key] = fn(*args, **kwargs)
+    return deepcopy(cache[key])
+  return wrapper
+
+# numba is optional -- when it is present the Bernoulli edge sampling
+# runs through a parallel JIT kernel, otherwise through plain NumPy
+try:
+  from numba import njit, prange
+  NUMBA_AVAILABLE = True
+except ImportError:
+  NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+  @njit(parallel=True, cache=True)
+  def _sample_bernoulli_mask_jit(p_edge):
+    n = p_edge.shape[0]
+    mask = np.zeros((n, n), dtype=np.bool_)
+    for i in prange(n):
+      for j in range(i+1, n):
+        if np.random.random() < p_edge[i, j]:
+          mask[i, j] = True
+    return mask
+
+'''
+Sample Bernoulli trials for every node pair in an edge probability
+matrix, returning the (rows, cols) indices of sampled edges in the
+upper triangle. Large matrices always go through the row-chunked
+sampler, which never materializes a full n x n mask (and quantizes
+above QUANTIZE_SAMPLE_THRESHOLD); smaller ones use the fused numba
+kernel when numba is installed, or a vectorized NumPy draw otherwise.
+
+:param p_edge: A square np array of edge probabilities.
+'''
+def sample_bernoulli_edges(p_edge):
+  if p_edge.shape[0] >= PARALLEL_SAMPLE_THRESHOLD:
+    return sample_bernoulli_edges_rowwise(p_edge)
+  if NUMBA_AVAILABLE:
+    mask = _sample_bernoulli_mask_jit(p_edge)
+  else:
+    R = _RNG.random(p_edge.shape, dtype=np.float32)
+    mask = np.triu(R < p_edge, 1)
+  return np.nonzero(mask)
+
+# Row count above which sample_bernoulli_edges samples row chunks on a
+# thread pool instead of materializing one full n x n random matrix
+PARALLEL_SAMPLE_THRESHOLD = 4096
+
+# Row count above which probabilities are quantized to 16-bit fixed
+# point and compared against uint16 draws -- a quarter of the memory
+# bandwidth of float64 at a precision loss of 1/65535, which is
+# immaterial for edge probabilities
+QUANTIZE_SAMPLE_THRESHOLD = 10000
+
+'''
+Sample Bernoulli edge trials chunk-of-rows at a time across a thread
+pool. Each chunk draws from its own generator spawned off one
+SeedSequence, so passing a seed keeps the result deterministic
+regardless of thread scheduling.
+
+:param p_edge: A square np array of edge probabilities.
+:param seed: An optional integer seed for reproducible sampling.
+:param n_jobs: The number of worker threads (defaults to the cpu count).
+'''
+def sample_bernoulli_edges_rowwise(p_edge, seed=None, n_jobs=None):
+  n = p_edge.shape[0]
+  n_jobs = n_jobs or os.cpu_count() or 1
+  bounds = np.linspace(0, n, n_jobs+1, dtype=np.int64)
+  rngs = [ np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_jobs) ]
+  quantize = n > QUANTIZE_SAMPLE_THRESHOLD
+  p_cmp = (p_edge * 65535).astype(np.uint16) if quantize else p_edge
+
+  def sample_chunk(start, stop, rng):
+    if quantize:
+      R = rng.integers(0, 65536, size=(stop-start, n), dtype=np.uint16)
+    else:
+      R = rng.random((stop-start, n), dtype=np.float32)
+    rows, cols = np.nonzero(R < p_cmp[start:stop])
+    rows += start
+    upper = cols > rows
+    return (rows[upper], cols[upper])
+
+  with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+    results = list(pool.map(sample_chunk, bounds[:-1], bounds[1:], rngs))
+  return (np.concatenate([ r[0] for r in results ]), np.concatenate([ r[1] for r in results ]))
+
 '''
 Return a NetLogo-safe Erdos-Renyi graph from the NetworkX package.
 
 :param n: The number of nodes for the graph.
 :param p: The probability of two random nodes connecting.
 '''
-def ER_graph_bidirected(n, p):
-  G = nx.erdos_renyi_graph(n, p)
-  return nlogo_safe_nodes_edges(bidirected_graph(G))
+@memoize_seeded
+def ER_graph_bidirected(n, p, seed=None):
+  if p < 0.1:
+    G = nx.fast_gnp_random_graph(n, p, seed=seed)
+  else:
+    rows, cols = ER_edge_sample(n, p, seed)
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(zip(rows.tolist(), cols.tolist()))
+  return nlogo_safe_nodes_edges_bidirected(G)
 
 '''
 Return a NetLogo-safe Erdos-Renyi graph from the NetworkX package.
@@ -34,10 +156,32 @@ Return a NetLogo-safe Erdos-Renyi graph from the NetworkX package.
 :param n: The number of nodes for the graph.
 :param p: The probability of two random nodes connecting.
 '''
-def ER_graph(n, p):
-  G = nx.erdos_renyi_graph(n, p)
+@memoize_seeded
+def ER_graph(n, p, seed=None):
+  if p < 0.1:
+    G = nx.fast_gnp_random_graph(n, p, seed=seed)
+  else:
+    rows, cols = ER_edge_sample(n, p, seed)
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(zip(rows.tolist(), cols.tolist()))
   return nlogo_safe_nodes_edges(G)
 
+'''
+Sample Erdos-Renyi edges for a dense p with one vectorized Bernoulli
+draw over all node pairs. Returns the (rows, cols) indices of sampled
+edges in the upper triangle.
+
+:param n: The number of nodes for the graph.
+:param p: The probability of two random nodes connecting.
+:param seed: An optional integer seed for reproducible sampling.
+'''
+def ER_edge_sample(n, p, seed=None):
+  rng = _RNG if seed is None else np.random.default_rng(seed)
+  mask = rng.random((n,n)) < p
+  mask = np.triu(mask, 1)
+  return np.nonzero(mask)
+
 '''
 Return a Netlogo-safe Watts-Strogatz graph from the NetworkX package.
 
@@ -45,9 +189,10 @@ Return a Netlogo-safe Watts-Strogatz graph from the NetworkX package.
 :param k: The number of initial neighbors.
 :param p: The probability of an edge rewiring.
 '''
-def WS_graph_bidirected(n, k, p):
-  G = nx.watts_strogatz_graph(n, k, p)
-  return nlogo_safe_nodes_edges(bidirected_graph(G))
+@memoize_seeded
+def WS_graph_bidirected(n, k, p, seed=None):
+  G = nx.watts_strogatz_graph(n, k, p, seed=seed)
+  return nlogo_safe_nodes_edges_bidirected(G)
 
 '''
 Return a Netlogo-safe Watts-Strogatz graph from the NetworkX package.
@@ -56,8 +201,9 @@ Return a Netlogo-safe Watts-Strogatz graph from the NetworkX package.
 :param k: The number of initial neighbors.
 :param p: The probability of an edge rewiring.
 '''
-def WS_graph(n, k, p):
-  G = nx.watts_strogatz_graph(n, k, p)
+@memoize_seeded
+def WS_graph(n, k, p, seed=None):
+  G = nx.watts_strogatz_graph(n, k, p, seed=seed)
   return nlogo_safe_nodes_edges(G)
 
 '''
@@ -66,9 +212,10 @@ Return a Netlogo-safe Barabasi-Albert graph from the NetworkX package.
 :param n: The number of nodes.
 :param m: The number of edges to connect with when a node is added.
 '''
-def BA_graph_bidirected(n, m):
-  G = nx.barabasi_albert_graph(n, m)
-  return nlogo_safe_nodes_edges(bidirected_graph(G))
+@memoize_seeded
+def BA_graph_bidirected(n, m, seed=None, fast=True):
+  G = BA_graph_sample(n, m, seed, fast)
+  return nlogo_safe_nodes_edges_bidirected(G)
 
 '''
 Return a Netlogo-safe Barabasi-Albert graph from the NetworkX package.
@@ -76,10 +223,61 @@ Return a Netlogo-safe Barabasi-Albert graph from the NetworkX package.
 :param n: The number of nodes.
 :param m: The number of edges to connect with when a node is added.
 '''
-def BA_graph(n, m):
-  G = nx.barabasi_albert_graph(n, m)
+@memoize_seeded
+def BA_graph(n, m, seed=None, fast=True):
+  G = BA_graph_sample(n, m, seed, fast)
   return nlogo_safe_nodes_edges(G)
 
+'''
+Build a Barabasi-Albert graph, either through the array-based
+preferential attachment sampler or the stock NetworkX generator.
+
+:param n: The number of nodes.
+:param m: The number of edges to connect with when a node is added.
+:param seed: An optional integer seed for reproducible sampling.
+:param fast: Whether to use the array-based sampler.
+'''
+def BA_graph_sample(n, m, seed=None, fast=True):
+  if fast:
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(BA_edge_sample(n, m, seed).tolist())
+    return G
+  return nx.barabasi_albert_graph(n, m, seed=seed)
+
+'''
+Sample Barabasi-Albert preferential attachment edges with a flat
+repeated-nodes array: each node appears in the array once per unit of
+degree, so uniform draws from it are degree-proportional. This keeps
+the whole attachment process in NumPy instead of NetworkX's per-step
+Python set operations.
+
+:param n: The number of nodes.
+:param m: The number of edges to connect with when a node is added.
+:param seed: An optional integer seed for reproducible sampling.
+'''
+def BA_edge_sample(n, m, seed=None):
+  rng = _RNG if seed is None else np.random.default_rng(seed)
+  repeated_nodes = np.empty(2 * m * (n - m), dtype=np.int64)
+  edges = np.empty((m * (n - m), 2), dtype=np.int64)
+  filled = 0
+  # The first new node connects to each of the m seed nodes
+  targets = np.arange(m)
+  for source in range(m, n):
+    if source > m:
+      # Draw until we have m distinct degree-proportional targets
+      targets = np.unique(rng.choice(repeated_nodes[:filled], size=m))
+      while len(targets) < m:
+        extra = rng.choice(repeated_nodes[:filled], size=m-len(targets))
+        targets = np.unique(np.concatenate((targets, extra)))
+    e = m * (source - m)
+    edges[e:e+m, 0] = source
+    edges[e:e+m, 1] = targets
+    repeated_nodes[filled:filled+m] = targets
+    repeated_nodes[filled+m:filled+2*m] = source
+    filled += 2 * m
+  return edges
+
 def BA_graph_homophilic(n, m, resolution, attrs):
   AMAGHomophilicTheta = lambda resolution: np.matrix([ HomophilicThetaRow(i, resolution, 1, 1, 0) for i in range(0, resolution) ])
   homophily = AMAGHomophilicTheta(resolution)
@@ -101,7 +299,7 @@ def BA_graph_homophilic(n, m, resolution, attrs):
         for j in range(len(attrs[node])):
           # print(f'multiplier between {attrs[m+i][j]} and {attrs[node][j]} is {AMAGHomophilicTheta(resolution)[(attrs[m+i][j],attrs[node][j])]}')
           p *= homophily[(attrs[m+i][j],attrs[node][j])]
-        rand = random()
+        rand = _RNG.random()
         if rand <= p:
           G.add_edge(m+i, node)
           edges_added += 1
@@ -122,20 +320,13 @@ to properly calculate the product of all attribute affinities for the matrix.
 '''
 def MAG_graph_bidirected(n, attrs, style, resolution):
   (p_edge, L) = mag.attr_mag(n, attrs, style, resolution)
-  # print(p_edge)
-  # print(L)
+  p_edge = np.asarray(p_edge, dtype=np.float32)
+  rows, cols = sample_bernoulli_edges(p_edge)
   G = nx.Graph()
-  G.add_nodes_from(range(0, len(p_edge[0])))
-  for i in range(0,len(p_edge)):
-    for j in range(0,len(p_edge)):
-      rand = random()
-      if (rand <= p_edge[(i,j)]):
-        # if (abs(L[i][0]-L[j][0]) >= 2):
-          # print(f'Chance to connect {L[i]} and {L[j]}: {p_edge[(i,j)]}')
-          # print(f'Rolled {rand}: {rand <= p_edge[(i,j)]}')
-        G.add_edge(i, j)
+  G.add_nodes_from(range(0, len(p_edge)))
+  G.add_edges_from(zip(rows.tolist(), cols.tolist()))
   # print(f'Num edges: {len(G.edges)}')
-  nlogo_G = nlogo_safe_nodes_edges(bidirected_graph(G))
+  nlogo_G = nlogo_safe_nodes_edges_bidirected(G)
   nlogo_G.update({'L': L})
   return nlogo_G
 
@@ -150,18 +341,11 @@ to properly calculate the product of all attribute affinities for the matrix.
 '''
 def MAG_graph(n, attrs, style, resolution):
   (p_edge, L) = mag.attr_mag(n, attrs, style, resolution)
-  # print(p_edge)
-  # print(L)
+  p_edge = np.asarray(p_edge, dtype=np.float32)
+  rows, cols = sample_bernoulli_edges(p_edge)
   G = nx.Graph()
-  G.add_nodes_from(range(0, len(p_edge[0])))
-  for i in range(0,len(p_edge)):
-    for j in range(0,len(p_edge)):
-      rand = random()
-      if (rand <= p_edge[(i,j)]):
-        # if (abs(L[i][0]-L[j][0]) >= 2):
-          # print(f'Chance to connect {L[i]} and {L[j]}: {p_edge[(i,j)]}')
-          # print(f'Rolled {rand}: {rand <= p_edge[(i,j)]}')
-        G.add_edge(i, j)
+  G.add_nodes_from(range(0, len(p_edge)))
+  G.add_edges_from(zip(rows.tolist(), cols.tolist()))
   # print(f'Num edges: {len(G.edges)}')
   nlogo_G = nlogo_safe_nodes_edges(G)
   nlogo_G.update({'L': L})
@@ -174,19 +358,7 @@ def kronecker_graph(seed, k):
   :param seed: An np array to Kronecker power.
   :param k: An integer to raise the graph to the Kronecker power of.
   '''
-  G_array = kronecker_pow(seed, k)
-  G = nx.Graph()
-  G.add_nodes_from(range(0, G_array.shape[0]))
-  for i in range(G_array.shape[0]):
-    row = G_array[i]
-    for j in range(G_array.shape[1]):
-      if i == j:
-        continue
-      p = row[j]
-      if random() < p:
-        G.add_edge(i,j)
-  largest_connected_component = max(nx.connected_components(G), key=len)
-  G.remove_nodes_from(G.nodes - largest_connected_component)
+  G = kronecker_graph_sample(seed, k)
   # return G
   return nlogo_safe_nodes_edges(G)
 
@@ -194,35 +366,52 @@ def kronecker_graph_bidirected(seed, k):
   '''
   Make a kronecker graph from a given seed to a power.
 
+  :param seed: An np array to Kronecker power.
+  :param k: An integer to raise the graph to the Kronecker power of.
+  '''
+  G = kronecker_graph_sample(seed, k)
+  return nlogo_safe_nodes_edges_bidirected(G)
+
+def kronecker_graph_sample(seed, k):
+  '''
+  Sample an undirected graph from the Kronecker power of a seed matrix
+  with one vectorized Bernoulli draw over the whole probability matrix,
+  trimmed to its largest connected component.
+
   :param seed: An np array to Kronecker power.
   :param k: An integer to raise the graph to the Kronecker power of.
   '''
   G_array = kronecker_pow(seed, k)
+  n = G_array.shape[0]
+  rows, cols = sample_bernoulli_edges(np.asarray(G_array, dtype=np.float32))
+  A = sparse.coo_array((np.ones(len(rows), dtype=np.bool_), (rows, cols)), shape=(n, n))
+  # Find the largest component on the sparse adjacency and only build
+  # the graph for it, rather than building everything and removing
+  # nodes one by one
+  num_components, labels = sparse.csgraph.connected_components(A, directed=False)
+  in_lcc = labels == np.bincount(labels).argmax()
+  edge_keep = in_lcc[rows]
   G = nx.Graph()
-  G.add_nodes_from(range(0, G_array.shape[0]))
-  for i in range(G_array.shape[0]):
-    row = G_array[i]
-    for j in range(G_array.shape[1]):
-      if i == j:
-        continue
-      p = row[j]
-      if random() < p:
-        G.add_edge(i,j)
-  largest_connected_component = max(nx.connected_components(G), key=len)
-  G.remove_nodes_from(G.nodes - largest_connected_component)
-  return nlogo_safe_nodes_edges(bidirected_graph(G))
+  G.add_nodes_from(np.nonzero(in_lcc)[0].tolist())
+  G.add_edges_from(zip(rows[edge_keep].tolist(), cols[edge_keep].tolist()))
+  return G
 
 def bidirected_graph(G):
   '''
   Convert an undirected graph to a directed graph where each
-  undirected edge becomes two directed edges.
+  undirected edge becomes two directed edges. The symmetrization is
+  done as one sparse A + A^T operation rather than re-inserting every
+  edge from Python.
 
   :param G: An undirected networkx graph.
   '''
-  bidirected_G = nx.DiGraph()
-  for edge in G.edges:
-    bidirected_G.add_edge(edge[0], edge[1])
-    bidirected_G.add_edge(edge[1], edge[0])
+  nodes = list(G.nodes)
+  A = nx.to_scipy_sparse_array(G, nodelist=nodes, format='csr')
+  B = A + A.T
+  B.data[:] = 1
+  bidirected_G = nx.from_scipy_sparse_array(B, create_using=nx.DiGraph)
+  if nodes != list(range(len(nodes))):
+    bidirected_G = nx.relabel_nodes(bidirected_G, dict(enumerate(nodes)))
   return bidirected_G
 
 '''
@@ -235,6 +424,51 @@ def nlogo_safe_nodes_edges(G):
   edges = [ [e[0], e[1]] for e in G.edges ]
   return { 'nodes': nodes, 'edges': edges }
 
+'''
+Return NetLogo-safe graph structures for an undirected graph whose
+edges should be reported in both directions. Emitting each edge twice
+here skips building a DiGraph intermediate just to double the edges.
+
+:param G: The undirected networkx graph to convert.
+'''
+def nlogo_safe_nodes_edges_bidirected(G):
+  nodes = list(G.nodes)
+  edges = [ [u, v] for u, v in G.edges ] + [ [v, u] for u, v in G.edges ]
+  return { 'nodes': nodes, 'edges': edges }
+
+'''
+Return NetLogo-safe graph structures in COO form: two flat lists of
+edge endpoints ('edge_rows', 'edge_cols') rather than one two-element
+list per edge. Two flat int lists serialize with roughly a third of
+the memory of the list-of-pairs layout on large graphs;
+nlogo_safe_nodes_edges stays as the shim for consumers that expect
+the 'edges' contract.
+
+:param G: The networkx graph to convert.
+'''
+def nlogo_safe_nodes_edges_coo(G):
+  nodes = np.fromiter(G.nodes, dtype=np.int32, count=len(G.nodes))
+  A = nx.to_scipy_sparse_array(G, nodelist=nodes.tolist(), format='coo')
+  rows, cols = nodes[A.row], nodes[A.col]
+  if not G.is_directed():
+    # Undirected adjacency stores both directions -- emit each edge once
+    upper = A.row <= A.col
+    rows, cols = rows[upper], cols[upper]
+  return { 'nodes': nodes.tolist(), 'edge_rows': rows.tolist(), 'edge_cols': cols.tolist() }
+
+_link_id_regex = re.compile(r'\d+')
+
+'''
+Extract the two endpoint ids from a NetLogo link string -- e.g.
+'(link 32 135)' yields (32, 135). Taking the last two numbers keeps
+this robust to breed names in the string.
+
+:param link: The NetLogo link string.
+'''
+def link_ids(link):
+  ids = _link_id_regex.findall(link)
+  return (int(ids[-2]), int(ids[-1]))
+
 '''
 Convert a graph from NetLogo to a networkx graph.
 
@@ -243,42 +477,55 @@ Convert a graph from NetLogo to a networkx graph.
 '''
 def nlogo_graph_to_nx(citizens, friend_links):
   G = nx.Graph()
-  for cit in citizens:
-    cit_id = int(cit['ID'])
-    G.add_node(cit_id)
-    for attr in cit['malleable']:
-      G.nodes[cit_id][attr] = cit[attr]
-    for attr in cit['prior']:
-      G.nodes[cit_id][attr] = cit[attr]
-  for link in friend_links:
-    link_split = link.split(' ')
-    end1 = link_split[1]
-    end2 = link_split[2].replace(')','')
-    G.add_edge(int(end1), int(end2))
+  G.add_nodes_from((int(cit['ID']), { attr: cit[attr] for attr in cit['malleable'] + cit['prior'] }) for cit in citizens)
+  G.add_edges_from([ link_ids(link) for link in friend_links ])
+  if len(citizens) > 0:
+    for attr in citizens[0]['malleable'] + citizens[0]['prior']:
+      refresh_attr_vector(G, attr)
   return G
 
 def nlogo_graph_to_nx_with_media(citizens, friend_links, media, subscribers):
   G = nx.Graph()
   agents = citizens + media
   links = friend_links + subscribers
-  for agent in agents:
-    cit_id = int(agent['ID'])
-    G.add_node(cit_id)
-    for attr in agent['malleable']:
-      G.nodes[cit_id][attr] = agent[attr]
-    for attr in agent['prior']:
-      G.nodes[cit_id][attr] = agent[attr]
-  for link in links:
-    link_split = link.split(' ')
-    end1 = link_split[1]
-    end2 = link_split[2].replace(')','')
-    G.add_edge(int(end1), int(end2))
+  G.add_nodes_from((int(agent['ID']), { attr: agent[attr] for attr in agent['malleable'] + agent['prior'] }) for agent in agents)
+  G.add_edges_from([ link_ids(link) for link in links ])
+  if len(agents) > 0:
+    for attr in agents[0]['malleable'] + agents[0]['prior']:
+      refresh_attr_vector(G, attr)
   return G
 
 
-def influencer_paths(G, subscribers, target):
-  target_id = int(target.split(' ')[1].replace(')', ''))
-  return { subscriber.split(' ')[2].replace(')',''): nx.all_simple_paths(G, subscriber.split(' ')[2].replace(')',''), target, cutoff=5) for subscriber in subscribers }
+'''
+Get all simple paths of length at most max_length from each subscriber
+to the target. One bounded depth-first enumeration from the target is
+shared across all subscribers, rather than re-running
+nx.all_simple_paths per subscriber; a single BFS pass from the target
+first determines which subscribers are reachable at all. Ids are cast
+to ints so they match the integer node labels in G (the old version
+passed the raw NetLogo strings through).
+
+:param G: The graph.
+:param subscribers: A list of subscribers of the influencer.
+:param target: The target node to find paths to.
+:param max_length: The maximum number of edges in an enumerated path.
+'''
+def influencer_paths(G, subscribers, target, max_length=5):
+  target_id = int(_link_id_regex.findall(target)[-1])
+  sub_ids = { link_ids(subscriber)[1] for subscriber in subscribers }
+  reachable = nx.single_source_shortest_path_length(G, target_id, cutoff=max_length)
+  paths_by_subscriber = { subscriber: [] for subscriber in sub_ids if subscriber in reachable }
+  stack = [ (target_id, [target_id]) ]
+  while stack:
+    node, path = stack.pop()
+    if len(path) > 1 and node in paths_by_subscriber:
+      # Reverse so the path runs subscriber -> target
+      paths_by_subscriber[node].append(path[::-1])
+    if len(path) <= max_length:
+      for neighbor in G[node]:
+        if neighbor not in path:
+          stack.append((neighbor, path + [neighbor]))
+  return paths_by_subscriber
 
 '''
 Get all paths from an influencer to a target node who only contain nodes within
@@ -295,21 +542,27 @@ exceed in valid paths.
 def influencer_paths_within_distance(citizens, friend_links, subscribers, target, message, threshold):
   G = nlogo_graph_to_nx(citizens, friend_links)
 
-  # Assign edge weights of the message distance to the first agent in the link
-  for e in G.edges:
-    G[e[0]][e[1]]['weight'] = dist_to_agent_brain(G.nodes[e[0]], message)
+  # Assign edge weights of the message distance to the first agent in the
+  # link -- the weight only depends on that agent, so compute each node's
+  # distance once rather than once per incident edge
+  node_dist = { n: dist_to_agent_brain(G.nodes[n], message) for n in G.nodes }
+  nx.set_edge_attributes(G, { (u,v): node_dist[u] for u,v in G.edges }, 'weight')
 
-  target_id = int(target.split(' ')[1].replace(')', ''))
-  paths = { int(subscriber.split(' ')[2].replace(')','')): nx.dijkstra_path(G, int(subscriber.split(' ')[2].replace(')','')), target_id) for subscriber in subscribers }
+  target_id = int(_link_id_regex.findall(target)[-1])
+  # One single-source Dijkstra from the target covers every subscriber;
+  # since G is undirected, each subscriber's path is the reverse of the
+  # target's path to it
+  lengths, paths = nx.single_source_dijkstra(G, target_id)
+  sub_ids = [ link_ids(subscriber)[1] for subscriber in subscribers ]
+  sub_paths = { subscriber: paths[subscriber][::-1] for subscriber in sub_ids if subscriber in paths }
 
   distance_paths = {}
   threshold_paths = {}
-  for subscriber in paths.keys():
-    dist_path = [ dist_to_agent_brain(G.nodes[v], message) for v in paths[subscriber] ]
-    dist_path = dist_path[:-1]
-    distance_paths[subscriber] = dist_path
-    if sum((np.array(dist_path)-threshold) > 0) == 0:
-      threshold_paths[subscriber] = dist_path
+  for subscriber, path in sub_paths.items():
+    dist_path = np.array([ dist_to_agent_brain(G.nodes[v], message) for v in path[:-1] ])
+    distance_paths[subscriber] = dist_path.tolist()
+    if (dist_path <= threshold).all():
+      threshold_paths[subscriber] = dist_path.tolist()
       # threshold_paths[subscriber] = paths[subscriber]
   return threshold_paths
 
@@ -405,6 +658,10 @@ def plot_graph_communities(G, level):
   '''
 
   '''
+  # Imported lazily so simulation runs that never plot skip the
+  # matplotlib import cost
+  import matplotlib.cm as cm
+  import matplotlib.pyplot as plt
   dendrogram = community.generate_dendrogram(G)
   partition = community.partition_at_level(dendrogram, level)
   pos = nx.spring_layout(G)
@@ -413,6 +670,33 @@ def plot_graph_communities(G, level):
   nx.draw_networkx_edges(G, pos, alpha=0.5)
   plt.show()
 
+def refresh_attr_vector(G, node_attr):
+  '''
+  Rebuild the cached structure-of-arrays attribute vector for a node
+  attribute. Measurement functions read this contiguous array instead
+  of doing N dict lookups per call; call this again after mutating the
+  attribute on any node.
+
+  :param G: The graph.
+  :param node_attr: The node attribute (string) to cache values for.
+  '''
+  vectors = G.graph.setdefault('attr_vectors', {})
+  vectors[node_attr] = np.fromiter((G.nodes[node][node_attr] for node in G.nodes), dtype=np.float32, count=len(G.nodes))
+  return vectors[node_attr]
+
+def node_attr_vector(G, node_attr):
+  '''
+  Get the cached attribute vector for a node attribute, building it on
+  first use.
+
+  :param G: The graph.
+  :param node_attr: The node attribute (string) to get values for.
+  '''
+  vectors = G.graph.get('attr_vectors', {})
+  if node_attr in vectors:
+    return vectors[node_attr]
+  return refresh_attr_vector(G, node_attr)
+
 def node_homophily(G, node):
   '''
   Get the homophily value for a single node in G.
@@ -421,10 +705,9 @@ def node_homophily(G, node):
   :param node: The integer node index to get.
   '''
   attrs = np.array([ list(G.nodes[node].values()) for node in G.nodes ])
-  norm_vector = np.array([ np.linalg.norm(attr - attrs[node]) for attr in attrs ])
-  adj = nx.adj_matrix(G)
-  # Note: adj[node] * norm_vector sums the values already
-  return (adj[node] * norm_vector) / adj[node].sum()
+  A = nx.to_scipy_sparse_array(G, format='csr', nodelist=list(G.nodes))
+  neighbors = A.indices[A.indptr[node]:A.indptr[node+1]]
+  return np.linalg.norm(attrs[neighbors] - attrs[node], axis=1).sum() / len(neighbors)
 
 def graph_homophily(G):
   '''
@@ -434,14 +717,16 @@ def graph_homophily(G):
 
   :param G: The networkx graph to take the measure on.
   '''
-  distances = []
   attrs = np.array([ list(G.nodes[node].values()) for node in G.nodes ])
-  adj = nx.adj_matrix(G)
-  for node in G.nodes:
-    norm_vector = np.array([ np.linalg.norm(attr - attrs[node]) for attr in attrs ])
-    # Note: adj[node] * norm_vector sums the values already
-    distances.append((adj[node] * norm_vector)[0] / adj[node].sum())
-  return (np.array(distances).mean(), np.array(distances).var())
+  A = nx.to_scipy_sparse_array(G, format='csr', nodelist=list(G.nodes))
+  degrees = np.diff(A.indptr)
+  # Attribute distance per stored edge, then summed per row -- O(E) in C
+  # rather than a Python loop over nodes
+  diffs = np.linalg.norm(attrs[A.indices] - np.repeat(attrs, degrees, axis=0), axis=1)
+  sums = np.bincount(np.repeat(np.arange(len(degrees)), degrees), weights=diffs, minlength=len(degrees))
+  # 0/0 leaves nan for friendless nodes, matching the old per-node division
+  distances = sums / degrees
+  return (distances.mean(), distances.var())
 
 def graph_polarization(G, node_attr, max_attr_value):
   '''
@@ -458,9 +743,9 @@ def graph_polarization(G, node_attr, max_attr_value):
   '''
   # This is done to keep the value in line w/ Musco et al. 2018's
   # scale of belief from [0,1]
-  attrs = np.array([ G.nodes[node][node_attr] / max_attr_value for node in G.nodes ])
-  mean_centered_attrs = attrs - attrs.sum()/len(attrs)
-  return mean_centered_attrs.dot(np.transpose(mean_centered_attrs))
+  attrs = node_attr_vector(G, node_attr) / max_attr_value
+  mean_centered_attrs = attrs - attrs.mean()
+  return float(mean_centered_attrs @ mean_centered_attrs)
 
 def nlogo_graph_polarization(citizens, friend_links, node_attr, max_attr_val):
   G = nlogo_graph_to_nx(citizens, friend_links)
@@ -479,13 +764,12 @@ def graph_disagreement(G, node_attr, max_attr_value):
   :param max_attr_value: The maximum that a belief value could be (belief
   resolution - 1).
   '''
-  total = 0
   # This is done to keep the value in line w/ Musco et al. 2018's
   # scale of belief from [0,1]
-  attrs = np.array([ G.nodes[node][node_attr] / max_attr_value for node in G.nodes ])
-  adj = nx.adj_matrix(G)
-  for node in G.nodes:
-    total += (adj[node] * (attrs - attrs[node])**2)[0]
+  attrs = node_attr_vector(G, node_attr) / max_attr_value
+  A = nx.to_scipy_sparse_array(G, format='coo', nodelist=list(G.nodes))
+  # Each undirected edge is stored in both directions, hence the /2
+  total = ((attrs[A.row] - attrs[A.col])**2).sum()
   return total/2
   
 def nlogo_graph_disagreement(citizens, friend_links, node_attr, max_attr_val):
@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 from itertools import groupby
@@ -12,6 +11,9 @@ Create a matplotlib histogram, show it, and save it.
 :param bar_tfm_fn: A function to transform bar height in the plot if needed. Set as the identity function as default.
 '''
 def plot_and_save_histogram(data, title, path, bar_tfm_fn=lambda x: x):
+  # Imported lazily so simulation runs that never plot skip the
+  # matplotlib import cost
+  import matplotlib.pyplot as plt
   sorted_rounded_data = sorted(np.round(data, 3))
   data_vals = list(set(sorted_rounded_data))
   freq = [ bar_tfm_fn(len(list(group))) for key, group in groupby(sorted_rounded_data) ]
@@ -33,6 +35,7 @@ Create a matplotlib histogram, show it, and save it.
 :param path: The path to save the plot in.
 '''
 def plot_and_save_series(data, title, path, kind):
+  import matplotlib.pyplot as plt
   freq_series = pd.Series(data)
 
   plt.figure(figsize=(8,6))